@@ -42,6 +42,15 @@ class JWK(json_util.TypedJSONObjectWithFields):
         'sort_keys': True,
     }
 
+    _thumbprint_cache = {}
+    """Memoized thumbprints.
+
+    Keys are immutable (and hashable), so the serialization and digest
+    only have to run once per key; a client computes the thumbprint of
+    the same account key for every challenge it answers.
+
+    """
+
     def thumbprint(self, hash_function=hashes.SHA256):
         """Compute JWK Thumbprint.
 
@@ -50,12 +59,19 @@ class JWK(json_util.TypedJSONObjectWithFields):
         :returns bytes:
 
         """
+        cache_key = (self, hash_function)
+        try:
+            return self._thumbprint_cache[cache_key]
+        except KeyError:
+            pass
         digest = hashes.Hash(hash_function(), backend=default_backend())
         digest.update(json.dumps(
             dict((k, v) for k, v in six.iteritems(self.to_json())
                  if k in self.required),
             **self._thumbprint_json_dumps_params).encode())
-        return digest.finalize()
+        thumbprint = digest.finalize()
+        self._thumbprint_cache[cache_key] = thumbprint
+        return thumbprint
 
     @abc.abstractmethod
     def public_key(self):  # pragma: no cover
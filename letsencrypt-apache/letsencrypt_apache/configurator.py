@@ -1107,7 +1107,7 @@ class ApacheConfigurator(augeas_configurator.AugeasConfigurator):
                 if idx == len(names) - 1:
                     args.pop()
                 self.parser.add_dir(general_vh.path, "RewriteCond", args)
-            if self.get_version() >= (2, 3, 9):
+            if self.version >= (2, 3, 9):
                 self.parser.add_dir(general_vh.path, "RewriteRule",
                                     constants.REWRITE_HTTPS_ARGS_WITH_END)
             else:
@@ -1219,7 +1219,7 @@ class ApacheConfigurator(augeas_configurator.AugeasConfigurator):
             serveralias = "ServerAlias " + " ".join(ssl_vhost.aliases)
 
         rewrite_rule_args = []
-        if self.get_version() >= (2, 3, 9):
+        if self.version >= (2, 3, 9):
             rewrite_rule_args = constants.REWRITE_HTTPS_ARGS_WITH_END
         else:
             rewrite_rule_args = constants.REWRITE_HTTPS_ARGS
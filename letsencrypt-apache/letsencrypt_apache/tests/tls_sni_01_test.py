@@ -58,7 +58,7 @@ class TlsSniPerformTest(util.ApacheTest):
         # Make sure that register_undo_command was called into temp directory.
         self.assertEqual(True, mock_register.call_args[0][0])
 
-        mock_setup_cert.assert_called_once_with(achall)
+        mock_setup_cert.assert_called_once_with(achall, mock.ANY)
 
         # Check to make sure challenge config path is included in apache config
         self.assertEqual(
@@ -87,9 +87,11 @@ class TlsSniPerformTest(util.ApacheTest):
 
         # Make sure calls made to mocked function were correct
         self.assertEqual(
-            mock_setup_cert.call_args_list[0], mock.call(self.achalls[0]))
+            mock_setup_cert.call_args_list[0],
+            mock.call(self.achalls[0], mock.ANY))
         self.assertEqual(
-            mock_setup_cert.call_args_list[1], mock.call(self.achalls[1]))
+            mock_setup_cert.call_args_list[1],
+            mock.call(self.achalls[1], mock.ANY))
 
         self.assertEqual(
             len(self.sni.configurator.parser.find_dir(
@@ -3,6 +3,8 @@
 import os
 import logging
 
+import OpenSSL
+
 from letsencrypt.plugins import common
 
 from letsencrypt_apache import obj
@@ -70,16 +72,21 @@ class ApacheTlsSni01(common.TLSSNI01):
 
         responses = []
 
+        # One self-signed key for all tls-sni-01 certificates, so the
+        # key is only generated once for the whole batch of challenges
+        cert_key = OpenSSL.crypto.PKey()
+        cert_key.generate_key(OpenSSL.crypto.TYPE_RSA, 2048)
+
         # Create all of the challenge certs
         for achall in self.achalls:
-            responses.append(self._setup_challenge_cert(achall))
+            responses.append(self._setup_challenge_cert(achall, cert_key))
 
         # Setup the configuration
         addrs = self._mod_config()
-        self.configurator.save("Don't lose mod_config changes", True)
         self.configurator.make_addrs_sni_ready(addrs)
 
-        # Save reversible changes
+        # Save the mod_config and SNI changes together in one
+        # reversible checkpoint; nothing in between touches disk
         self.configurator.save("SNI Challenge", True)
 
         return responses
@@ -94,15 +101,17 @@ class ApacheTlsSni01(common.TLSSNI01):
 
         """
         addrs = set()
-        config_text = "<IfModule mod_ssl.c>\n"
+        config_text_parts = ["<IfModule mod_ssl.c>\n"]
 
         for achall in self.achalls:
             achall_addrs = self._get_addrs(achall)
             addrs.update(achall_addrs)
 
-            config_text += self._get_config_text(achall, achall_addrs)
+            config_text_parts.append(
+                self._get_config_text(achall, achall_addrs))
 
-        config_text += "</IfModule>\n"
+        config_text_parts.append("</IfModule>\n")
+        config_text = "".join(config_text_parts)
 
         self._conf_include_check(self.configurator.parser.loc["default"])
         self.configurator.reverter.register_file_creation(
@@ -141,6 +150,17 @@ class ApacheTlsSni01(common.TLSSNI01):
         :param str main_config: file path to main user apache config file
 
         """
+        # Check the main config text for the literal path first; the
+        # include is only ever added verbatim, so a plain substring scan
+        # lets us skip the much more expensive Augeas tree search on the
+        # common "already included" path.
+        try:
+            with open(main_config) as conf_fd:
+                if self.challenge_conf in conf_fd.read():
+                    return
+        except IOError:
+            pass
+
         if len(self.configurator.parser.find_dir(
                 parser.case_i("Include"), self.challenge_conf)) == 0:
             # print "Including challenge virtual host(s)"
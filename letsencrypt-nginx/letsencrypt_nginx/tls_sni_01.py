@@ -61,10 +61,8 @@ class NginxTlsSni01(common.TLSSNI01):
                     achall.domain)
                 return None
 
-            for addr in vhost.addrs:
-                if addr.default:
-                    addresses.append([obj.Addr.fromstring(default_addr)])
-                    break
+            if any(addr.default for addr in vhost.addrs):
+                addresses.append([obj.Addr.fromstring(default_addr)])
             else:
                 addresses.append(list(vhost.addrs))
 
@@ -1,21 +1,17 @@
 """Let's Encrypt command line argument & config processing."""
 from __future__ import print_function
 import argparse
-import glob
 import logging
 import logging.handlers
 import os
 import sys
-import traceback
 
 import configargparse
-import OpenSSL
 import six
 
 import letsencrypt
 
 from letsencrypt import constants
-from letsencrypt import crypto_util
 from letsencrypt import errors
 from letsencrypt import hooks
 from letsencrypt import interfaces
@@ -29,6 +25,10 @@ logger = logging.getLogger(__name__)
 # Global, to save us from a lot of argument passing within the scope of this module
 helpful_parser = None
 
+# The plugins registry discovered for the main parser; reused by set_by_cli
+# so the pkg_resources entry point scan only runs once per process
+_plugins = None
+
 # For help strings, figure out how the user ran us.
 # When invoked from letsencrypt-auto, sys.argv[0] is something like:
 # "/home/user/.local/share/letsencrypt/bin/letsencrypt"
@@ -37,7 +37,9 @@ helpful_parser = None
 # should only be used for purposes where inability to detect letsencrypt-auto
 # fails safely
 
-fragment = os.path.join(".local", "share", "letsencrypt")
+# letsencrypt-auto only exists on POSIX systems, so a literal path
+# fragment is correct here and saves an os.path.join on every import
+fragment = ".local/share/letsencrypt"
 cli_command = "letsencrypt-auto" if fragment in sys.argv[0] else "letsencrypt"
 
 # Argparse's help formatting has a lot of unhelpful peculiarities, so we want
@@ -45,7 +47,7 @@ cli_command = "letsencrypt-auto" if fragment in sys.argv[0] else "letsencrypt"
 
 # This is the stub to include in help generated by argparse
 
-SHORT_USAGE = """
+_SHORT_USAGE_TEMPLATE = """
   {0} [SUBCOMMAND] [options] [-d domain] [-d domain] ...
 
 The Let's Encrypt agent can obtain and install HTTPS/TLS/SSL certificates.  By
@@ -61,11 +63,12 @@ the cert. Major SUBCOMMANDS are:
   config_changes       Show changes made to server config during installation
   plugins              Display information about installed plugins
 
-""".format(cli_command)
+"""
 
 # This is the short help for letsencrypt --help, where we disable argparse
-# altogether
-USAGE = SHORT_USAGE + """Choice of server plugins for obtaining and installing cert:
+# altogether; the substitution happens in usage_strings so non-help
+# invocations never pay for building these strings
+_USAGE_TEMPLATE = """Choice of server plugins for obtaining and installing cert:
 
   %s
   --standalone      Run a standalone webserver for authentication
@@ -86,6 +89,17 @@ More detailed help:
 """
 
 
+# Topics for which additional help can be provided, besides the
+# subcommands and plugin names (built when the parser is)
+_STATIC_HELP_TOPICS = ("all", "security", "paths", "automation", "testing")
+
+
+# Built once here; inside _paths_parser the concatenation with the
+# staging URI would run on every parser construction
+_STAGING_HELP = ('Use the staging server to obtain test (invalid) certs; '
+                 'equivalent to --server ' + constants.STAGING_URI)
+
+
 # These argparse parameters should be removed when detecting defaults.
 ARGPARSE_PARAMS_TO_REMOVE = ("const", "nargs", "type",)
 
@@ -128,6 +142,19 @@ def report_config_interaction(modified, modifiers):
         VAR_MODIFIERS.setdefault(var, set()).update(modifiers)
 
 
+def _has_any_account(config_dir):
+    """Does ``config_dir`` hold at least one registered account?
+
+    A plain listdir is enough here; globbing the accounts directory would
+    stat and fnmatch every entry just to answer a yes/no question.
+
+    """
+    try:
+        return bool(os.listdir(os.path.join(config_dir, constants.ACCOUNTS_DIR)))
+    except OSError:
+        return False
+
+
 def usage_strings(plugins):
     """Make usage strings late so that plugins can be initialised late"""
     if "nginx" in plugins:
@@ -138,7 +165,8 @@ def usage_strings(plugins):
         apache_doc = "--apache          Use the Apache plugin for authentication & installation"
     else:
         apache_doc = "(the apache plugin is not installed)"
-    return USAGE % (apache_doc, nginx_doc), SHORT_USAGE
+    short_usage = _SHORT_USAGE_TEMPLATE.format(cli_command)
+    return short_usage + _USAGE_TEMPLATE % (apache_doc, nginx_doc), short_usage
 
 
 class _Default(object):
@@ -167,7 +195,11 @@ def set_by_cli(var):
     if detector is None:
         # Setup on first run: `detector` is a weird version of config in which
         # the default value of every attribute is wrangled to be boolean-false
-        plugins = plugins_disco.PluginsRegistry.find_all()
+        # Reuse the plugins the main parser already discovered instead of
+        # re-running the pkg_resources entry point scan
+        plugins = _plugins
+        if plugins is None:
+            plugins = plugins_disco.PluginsRegistry.find_all()
         # reconstructed_args == sys.argv[1:], or whatever was passed to main()
         reconstructed_args = helpful_parser.args + [helpful_parser.verb]
         detector = set_by_cli.detector = prepare_and_parse_args(
@@ -175,27 +207,40 @@ def set_by_cli(var):
         # propagate plugin requests: eg --standalone modifies config.authenticator
         detector.authenticator, detector.installer = (
             plugin_selection.cli_plugin_requests(detector))
+        # answers memoized against the old detector are now stale
+        set_by_cli.answers.clear()
         logger.debug("Default Detector is %r", detector)
 
-    if not isinstance(getattr(detector, var), _Default):
-        return True
+    if var in set_by_cli.answers:
+        return set_by_cli.answers[var]
 
-    for modifier in VAR_MODIFIERS.get(var, []):
-        if set_by_cli(modifier):
-            return True
+    # the detector is immutable once built, so the answer can be memoized
+    result = not isinstance(getattr(detector, var), _Default)
+    if not result:
+        for modifier in VAR_MODIFIERS.get(var, []):
+            if set_by_cli(modifier):
+                result = True
+                break
 
-    return False
-# static housekeeping var
+    set_by_cli.answers[var] = result
+    return result
+# static housekeeping vars
 set_by_cli.detector = None
+set_by_cli.answers = {}
 
 
 def argparse_type(variable):
     "Return our argparse type function for a config variable (default: str)"
     # pylint: disable=protected-access
-    for action in helpful_parser.parser._actions:
-        if action.type is not None and action.dest == variable:
-            return action.type
-    return str
+    if helpful_parser.types_by_dest is None:
+        # The parser's action list is final by the time anybody asks for
+        # types, so build the lookup table once instead of scanning the
+        # dozens of actions on every call
+        helpful_parser.types_by_dest = dict(
+            (action.dest, action.type)
+            for action in helpful_parser.parser._actions
+            if action.type is not None)
+    return helpful_parser.types_by_dest.get(variable, str)
 
 def read_file(filename, mode="rb"):
     """Returns the given file's contents.
@@ -211,18 +256,44 @@ def read_file(filename, mode="rb"):
     """
     try:
         filename = os.path.abspath(filename)
-        return filename, open(filename, mode).read()
+        with open(filename, mode) as a_file:
+            return filename, a_file.read()
     except IOError as exc:
         raise argparse.ArgumentTypeError(exc.strerror)
 
 
+# Bound once so flag_default, called dozens of times while the parser is
+# built, skips the constants attribute lookup on each call
+_CLI_DEFAULTS = constants.CLI_DEFAULTS
+
+
 def flag_default(name):
     """Default value for CLI flag."""
     # XXX: this is an internal housekeeping notion of defaults before
     # argparse has been set up; it is not accurate for all flags.  Call it
     # with caution.  Plugin defaults are missing, and some things are using
     # defaults defined in this file, not in constants.py :(
-    return constants.CLI_DEFAULTS[name]
+    return _CLI_DEFAULTS[name]
+
+
+_existing_config_files = None
+
+
+def _default_config_files():
+    """Default config files that are actually present on this system.
+
+    Scanned once per process: configargparse probes its
+    ``default_config_files`` on every parse, and set_by_cli builds a
+    second parser, so sharing one scan avoids repeating the filesystem
+    checks for config files that do not exist.
+
+    """
+    global _existing_config_files  # pylint: disable=global-statement
+    if _existing_config_files is None:
+        _existing_config_files = [
+            path for path in flag_default("config_files")
+            if os.path.isfile(os.path.expanduser(path))]
+    return _existing_config_files
 
 
 def config_help(name, hidden=False):
@@ -268,35 +339,43 @@ class HelpfulArgumentParser(object):
                       "renew": main.renew, "revoke": main.revoke,
                       "rollback": main.rollback, "everything": main.run}
 
-        # List of topics for which additional help can be provided
-        HELP_TOPICS = ["all", "security", "paths", "automation", "testing"] + list(self.VERBS)
-
-        plugin_names = list(plugins)
-        self.help_topics = HELP_TOPICS + plugin_names + [None]
-        usage, short_usage = usage_strings(plugins)
-        self.parser = configargparse.ArgParser(
-            usage=short_usage,
-            formatter_class=argparse.ArgumentDefaultsHelpFormatter,
-            args_for_setting_config_path=["-c", "--config"],
-            default_config_files=flag_default("config_files"))
-
-        # This is the only way to turn off overly verbose config flag documentation
-        self.parser._add_config_file_help = False  # pylint: disable=protected-access
+        self.help_topics = (list(_STATIC_HELP_TOPICS) + list(self.VERBS)
+                            + list(plugins) + [None])
 
         self.detect_defaults = detect_defaults
 
         self.args = args
         self.determine_verb()
-        help1 = self.prescan_for_flag("-h", self.help_topics)
-        help2 = self.prescan_for_flag("--help", self.help_topics)
-        assert max(True, "a") == "a", "Gravity changed direction"
-        self.help_arg = max(help1, help2)
+        self.help_arg = self.prescan_for_help()
         if self.help_arg is True:
             # just --help with no topic; avoid argparse altogether
+            usage, _ = usage_strings(plugins)
             print(usage)
             sys.exit(0)
+        if "--version" in self.args:
+            # --version needs no topics, subparsers or plugin args; skip
+            # building the rest of the parser (it prints to stderr for
+            # consistency with argparse's version action)
+            sys.stderr.write("{0} {1}{2}".format(
+                cli_command, letsencrypt.__version__, os.linesep))
+            sys.exit(0)
+
+        # Only build the (comparatively expensive) configargparse parser,
+        # which globs for default config files, once the fast paths above
+        # have had their chance to exit
+        _, short_usage = usage_strings(plugins)
+        self.parser = configargparse.ArgParser(
+            usage=short_usage,
+            formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+            args_for_setting_config_path=["-c", "--config"],
+            default_config_files=_default_config_files())
+
+        # This is the only way to turn off overly verbose config flag documentation
+        self.parser._add_config_file_help = False  # pylint: disable=protected-access
+
         self.visible_topics = self.determine_help_topics(self.help_arg)
         self.groups = {}       # elements are added by .add_group()
+        self.types_by_dest = None  # lazily built by argparse_type()
 
     def parse_args(self):
         """Parses command line arguments and returns the result.
@@ -328,7 +407,7 @@ class HelpfulArgumentParser(object):
                     raise errors.Error("--dry-run currently only works with the "
                                        "'certonly' or 'renew' subcommands (%r)" % self.verb)
                 parsed_args.break_my_certs = parsed_args.staging = True
-                if glob.glob(os.path.join(parsed_args.config_dir, constants.ACCOUNTS_DIR, "*")):
+                if _has_any_account(parsed_args.config_dir):
                     # The user has a prod account, but might not have a staging
                     # one; we don't want to start trying to perform interactive registration
                     parsed_args.tos = True
@@ -346,6 +425,11 @@ class HelpfulArgumentParser(object):
 
     def handle_csr(self, parsed_args):
         """Process a --csr flag."""
+        # Only the --csr code path pays for loading the crypto stack
+        import traceback
+        import OpenSSL
+        from letsencrypt import crypto_util
+
         if parsed_args.verb != "certonly":
             raise errors.Error("Currently, a CSR file may only be specified "
                                "when obtaining a new or replacement "
@@ -357,29 +441,34 @@ class HelpfulArgumentParser(object):
             typ = OpenSSL.crypto.FILETYPE_ASN1
             domains = crypto_util.get_sans_from_csr(csr.data, OpenSSL.crypto.FILETYPE_ASN1)
         except OpenSSL.crypto.Error:
+            # hold on to the DER failure, but only format it (an
+            # expensive frame walk) if the PEM parse fails too
+            der_exc_info = sys.exc_info()
             try:
-                e1 = traceback.format_exc()
                 typ = OpenSSL.crypto.FILETYPE_PEM
                 csr = le_util.CSR(file=parsed_args.csr[0], data=parsed_args.csr[1], form="pem")
                 domains = crypto_util.get_sans_from_csr(csr.data, typ)
             except OpenSSL.crypto.Error:
-                logger.debug("DER CSR parse error %s", e1)
+                logger.debug("DER CSR parse error %s",
+                             "".join(traceback.format_exception(*der_exc_info)))
                 logger.debug("PEM CSR parse error %s", traceback.format_exc())
                 raise errors.Error("Failed to parse CSR file: {0}".format(parsed_args.csr[0]))
 
         # This is not necessary for webroot to work, however,
         # obtain_certificate_from_csr requires parsed_args.domains to be set
+        csr_domains = set()
         for domain in domains:
             add_domains(parsed_args, domain)
+            csr_domains.add(domain)
 
-        if not domains:
+        if not csr_domains:
             # TODO: add CN to domains instead:
             raise errors.Error(
                 "Unfortunately, your CSR %s needs to have a SubjectAltName for every domain"
                 % parsed_args.csr[0])
 
         parsed_args.actual_csr = (csr, typ)
-        csr_domains, config_domains = set(domains), set(parsed_args.domains)
+        config_domains = set(parsed_args.domains)
         if csr_domains != config_domains:
             raise errors.ConfigurationError(
                 "Inconsistent domain requests:\nFrom the CSR: {0}\nFrom command line/config: {1}"
@@ -397,39 +486,44 @@ class HelpfulArgumentParser(object):
             self.verb = "help"
             return
 
-        for i, token in enumerate(self.args):
-            if token in self.VERBS:
-                verb = token
-                if verb == "auth":
-                    verb = "certonly"
-                if verb == "everything":
-                    verb = "run"
-                self.verb = verb
-                self.args.pop(i)
-                return
-
+        # single pass: record the first verb and build argv without it,
+        # instead of scanning and then shifting the list with pop()
         self.verb = "run"
-
-    def prescan_for_flag(self, flag, possible_arguments):
-        """Checks cli input for flags.
-
-        Check for a flag, which accepts a fixed set of possible arguments, in
-        the command line; we will use this information to configure argparse's
-        help correctly.  Return the flag's argument, if it has one that matches
-        the sequence @possible_arguments; otherwise return whether the flag is
-        present.
+        found_verb = False
+        remaining_args = []
+        for token in self.args:
+            if not found_verb and token in self.VERBS:
+                found_verb = True
+                if token == "auth":
+                    token = "certonly"
+                if token == "everything":
+                    token = "run"
+                self.verb = token
+                continue
+            remaining_args.append(token)
+        self.args = remaining_args
+
+    def prescan_for_help(self):
+        """Checks cli input for help flags.
+
+        Check for -h/--help in the command line in a single pass over
+        the arguments; we will use this information to configure
+        argparse's help correctly.  Return the flag's argument, if it
+        has one that names a known help topic; otherwise return whether
+        a help flag is present.
 
         """
-        if flag not in self.args:
-            return False
-        pos = self.args.index(flag)
-        try:
-            nxt = self.args[pos + 1]
-            if nxt in possible_arguments:
-                return nxt
-        except IndexError:
-            pass
-        return True
+        found = False
+        for pos, token in enumerate(self.args):
+            if token == "-h" or token == "--help":
+                try:
+                    nxt = self.args[pos + 1]
+                except IndexError:
+                    nxt = None
+                if nxt is not None and nxt in self.help_topics:
+                    return nxt
+                found = True
+        return found
 
     def add(self, topic, *args, **kwargs):
         """Add a new command line argument.
@@ -444,15 +538,40 @@ class HelpfulArgumentParser(object):
         if self.detect_defaults:
             kwargs = self.modify_kwargs_for_default_detection(**kwargs)
 
-        if self.visible_topics[topic]:
-            if topic in self.groups:
-                group = self.groups[topic]
-                group.add_argument(*args, **kwargs)
-            else:
-                self.parser.add_argument(*args, **kwargs)
-        else:
+        if topic not in self.visible_topics:
+            # checked first because unless a help topic was requested,
+            # every argument takes this branch
             kwargs["help"] = argparse.SUPPRESS
             self.parser.add_argument(*args, **kwargs)
+        elif topic in self.groups:
+            self.groups[topic].add_argument(*args, **kwargs)
+        else:
+            self.parser.add_argument(*args, **kwargs)
+
+    def add_many(self, topic, items):
+        """Add a batch of command line arguments under one help topic.
+
+        Resolves the topic's visibility and destination group once
+        instead of per argument, which add() must redo on every call.
+
+        :param str topic: help topic shared by all of the arguments
+        :param items: pairs of (argument flags, argparse settings)
+        :type items: `list` of (`tuple`, `dict`)
+
+        """
+        if topic in self.visible_topics:
+            target = self.groups.get(topic, self.parser)
+            suppress = False
+        else:
+            target = self.parser
+            suppress = True
+        add_argument = target.add_argument
+        for args, kwargs in items:
+            if self.detect_defaults:
+                kwargs = self.modify_kwargs_for_default_detection(**kwargs)
+            if suppress:
+                kwargs["help"] = argparse.SUPPRESS
+            add_argument(*args, **kwargs)
 
     def modify_kwargs_for_default_detection(self, **kwargs):
         """Modify an arg so we can check if it was set by the user.
@@ -503,7 +622,7 @@ class HelpfulArgumentParser(object):
         :rtype: `HelpfulArgumentGroup`
 
         """
-        if self.visible_topics[topic]:
+        if topic in self.visible_topics:
             self.groups[topic] = self.parser.add_argument_group(topic, **kwargs)
 
         return HelpfulArgumentGroup(self, topic)
@@ -522,24 +641,24 @@ class HelpfulArgumentParser(object):
     def determine_help_topics(self, chosen_topic):
         """
 
-        The user may have requested help on a topic, return a dict of which
-        topics to display. @chosen_topic has prescan_for_flag's return type
+        The user may have requested help on a topic, return the set of
+        topics to display. @chosen_topic has prescan_for_help's return type
 
-        :returns: dict
+        :returns: frozenset
 
         """
-        # topics maps each topic to whether it should be documented by
+        # the returned set holds each topic that should be documented by
         # argparse on the command line
         if chosen_topic == "auth":
             chosen_topic = "certonly"
         if chosen_topic == "everything":
             chosen_topic = "run"
         if chosen_topic == "all":
-            return dict([(t, True) for t in self.help_topics])
+            return frozenset(self.help_topics)
         elif not chosen_topic:
-            return dict([(t, False) for t in self.help_topics])
+            return frozenset()
         else:
-            return dict([(t, t == chosen_topic) for t in self.help_topics])
+            return frozenset((chosen_topic,))
 
 
 def prepare_and_parse_args(plugins, args, detect_defaults=False):
@@ -745,8 +864,9 @@ def prepare_and_parse_args(plugins, args, detect_defaults=False):
     _plugins_parsing(helpful, plugins)
 
     if not detect_defaults:
-        global helpful_parser # pylint: disable=global-statement
+        global helpful_parser, _plugins # pylint: disable=global-statement
         helpful_parser = helpful
+        _plugins = plugins
     return helpful.parse_args()
 
 
@@ -813,8 +933,8 @@ def _paths_parser(helpful):
     if verb in ("install", "revoke"):
         section = verb
     # revoke --key-path reads a file, install --key-path takes a string
-    add(section, "--key-path", required=(verb == "install"),
-        type=((verb == "revoke" and read_file) or os.path.abspath),
+    key_type = read_file if verb == "revoke" else os.path.abspath
+    add(section, "--key-path", required=(verb == "install"), type=key_type,
         help="Path to private key for cert installation "
              "or revocation (if account key is missing)")
 
@@ -835,8 +955,7 @@ def _paths_parser(helpful):
         help=config_help("server"))
     # overwrites server, handled in HelpfulArgumentParser.parse_args()
     add("testing", "--test-cert", "--staging", action='store_true', dest='staging',
-        help='Use the staging server to obtain test (invalid) certs; equivalent'
-             ' to --server ' + constants.STAGING_URI)
+        help=_STAGING_HELP)
 
 
 def _plugins_parsing(helpful, plugins):
@@ -854,16 +973,23 @@ def _plugins_parsing(helpful, plugins):
         "plugins", "--configurator", help="Name of the plugin that is "
         "both an authenticator and an installer. Should not be used "
         "together with --authenticator or --installer.")
-    helpful.add("plugins", "--apache", action="store_true",
-                help="Obtain and install certs using Apache")
-    helpful.add("plugins", "--nginx", action="store_true",
-                help="Obtain and install certs using Nginx")
-    helpful.add("plugins", "--standalone", action="store_true",
-                help='Obtain certs using a "standalone" webserver.')
-    helpful.add("plugins", "--manual", action="store_true",
-                help='Provide laborious manual instructions for obtaining a cert')
-    helpful.add("plugins", "--webroot", action="store_true",
-                help='Obtain certs by placing files in a webroot directory.')
+    helpful.add_many("plugins", [
+        (("--apache",), dict(
+            action="store_true",
+            help="Obtain and install certs using Apache")),
+        (("--nginx",), dict(
+            action="store_true",
+            help="Obtain and install certs using Nginx")),
+        (("--standalone",), dict(
+            action="store_true",
+            help='Obtain certs using a "standalone" webserver.')),
+        (("--manual",), dict(
+            action="store_true",
+            help='Provide laborious manual instructions for obtaining a cert')),
+        (("--webroot",), dict(
+            action="store_true",
+            help='Obtain certs by placing files in a webroot directory.')),
+    ])
 
     # things should not be reorder past/pre this comment:
     # plugins_group should be displayed in --help before plugin
@@ -896,10 +1022,14 @@ def add_domains(args_or_config, domains):
 
     """
     validated_domains = []
+    # membership test against a set instead of scanning the (possibly
+    # long) domains list once per domain
+    known_domains = set(args_or_config.domains)
     for domain in domains.split(","):
         domain = le_util.enforce_domain_sanity(domain.strip())
         validated_domains.append(domain)
-        if domain not in args_or_config.domains:
+        if domain not in known_domains:
+            known_domains.add(domain)
             args_or_config.domains.append(domain)
 
     return validated_domains
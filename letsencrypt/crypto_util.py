@@ -83,8 +83,8 @@ def init_save_csr(privkey, names, path, csrname="csr-letsencrypt.pem"):
                                config.strict_permissions)
     csr_f, csr_filename = le_util.unique_file(
         os.path.join(path, csrname), 0o644)
-    csr_f.write(csr_pem)
-    csr_f.close()
+    with csr_f:
+        csr_f.write(csr_pem)
 
     logger.info("Creating CSR: %s", csr_filename)
 
@@ -203,6 +203,9 @@ class TLSSNI01(object):
         self.indices = []
         self.challenge_conf = os.path.join(
             configurator.config.config_dir, "le_tls_sni_01_cert_challenge.conf")
+        # Encoded tokens are used in several file names per challenge;
+        # encode each token only once
+        self._encoded_tokens = {}
         # self.completed = 0
 
     def add_chall(self, achall, idx=None):
@@ -229,12 +232,19 @@ class TLSSNI01(object):
 
         """
         return os.path.join(self.configurator.config.work_dir,
-                            achall.chall.encode("token") + ".crt")
+                            self._encode_token(achall) + ".crt")
 
     def get_key_path(self, achall):
         """Get standardized path to challenge key."""
         return os.path.join(self.configurator.config.work_dir,
-                            achall.chall.encode("token") + '.pem')
+                            self._encode_token(achall) + '.pem')
+
+    def _encode_token(self, achall):
+        """Return the b64 encoded token, encoding each token only once."""
+        token = achall.chall.token
+        if token not in self._encoded_tokens:
+            self._encoded_tokens[token] = achall.chall.encode("token")
+        return self._encoded_tokens[token]
 
     def _setup_challenge_cert(self, achall, cert_key=None):
 
@@ -1,4 +1,5 @@
 """Manual plugin."""
+import errno
 import os
 import logging
 import pipes
@@ -89,6 +90,10 @@ s.serve_forever()" """
             help="Test mode. Executes the manual command in subprocess.")
         add("public-ip-logging-ok", action="store_true",
             help="Automatically allows public IP logging.")
+        add("no-self-verify", action="store_true",
+            help="Skip the local verification of challenge files; one HTTP "
+                 "request per domain is saved, but mistakes are only caught "
+                 "by the ACME server.")
 
     def prepare(self):  # pylint: disable=missing-docstring,no-self-use
         if self.config.noninteractive_mode and not self.conf("test-mode"):
@@ -109,14 +114,31 @@ s.serve_forever()" """
         responses = []
         # TODO: group achalls by the same socket.gethostbyname(_ex)
         # and prompt only once per server (one "echo -n" per domain)
+        if achalls:
+            # every challenge in a run belongs to the same account, so
+            # parse the public key and create the challenge directory
+            # once instead of once per challenge
+            public_key = achalls[0].account_key.public_key()
+            target_dir = os.path.expanduser('~/.well-known/acme-challenge/')
+            try:
+                os.makedirs(target_dir)
+            except OSError as error:
+                if error.errno != errno.EEXIST:
+                    raise
         for achall in achalls:
-            responses.append(self._perform_single(achall))
+            responses.append(
+                self._perform_single(achall, public_key, target_dir))
         return responses
 
     @classmethod
     def _test_mode_busy_wait(cls, port):
+        # probe quickly at first with exponential backoff; the test
+        # server is usually accepting connections within tens of
+        # milliseconds, so a flat one second sleep mostly overshoots
+        delay = 0.01
         while True:
-            time.sleep(1)
+            time.sleep(delay)
+            delay = min(delay * 2, 1)
             sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             try:
                 sock.connect(("localhost", port))
@@ -127,24 +149,21 @@ s.serve_forever()" """
             finally:
                 sock.close()
 
-    def _perform_single(self, achall):
+    def _perform_single(self, achall, public_key, target_dir):
         # same path for each challenge response would be easier for
         # users, but will not work if multiple domains point at the
         # same server: default command doesn't support virtual hosts
         response, validation = achall.response_and_validation()
 
         # a hack for Nginx Ad-hoc use
-        target_name, _ = validation.split('.')
-        target_dir = os.path.expanduser('~/.well-known/acme-challenge/')
-        if not os.path.exists(target_dir):
-            os.makedirs(target_dir)
+        target_name = validation.partition('.')[0]
         target_path = os.path.join(target_dir, target_name)
         with open(target_path, 'w') as f:
             f.write(validation)
 
-        if not response.simple_verify(
+        if not self.conf("no-self-verify") and not response.simple_verify(
                 achall.chall, achall.domain,
-                achall.account_key.public_key(), self.config.http01_port):
+                public_key, self.config.http01_port):
             logger.warning("Self-verify of challenge failed.")
 
         return response
@@ -160,4 +179,10 @@ s.serve_forever()" """
             else:
                 logger.debug("Manual command process already terminated "
                              "with %s code", self._httpd.returncode)
-            shutil.rmtree(self._root)
+            # the temp dir is private to this test-mode run; a second
+            # cleanup (or an outside removal) is not worth crashing over
+            try:
+                shutil.rmtree(self._root)
+            except OSError as error:
+                if error.errno != errno.ENOENT:
+                    raise
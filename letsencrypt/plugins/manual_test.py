@@ -24,13 +24,15 @@ class AuthenticatorTest(unittest.TestCase):
         from letsencrypt.plugins.manual import Authenticator
         self.config = mock.MagicMock(
             http01_port=8080, manual_test_mode=False,
-            manual_public_ip_logging_ok=False, noninteractive_mode=True)
+            manual_public_ip_logging_ok=False, manual_no_self_verify=False,
+            noninteractive_mode=True)
         self.auth = Authenticator(config=self.config, name="manual")
         self.achalls = [achallenges.KeyAuthorizationAnnotatedChallenge(
             challb=acme_util.HTTP01_P, domain="foo.com", account_key=KEY)]
 
         config_test_mode = mock.MagicMock(
-            http01_port=8080, manual_test_mode=True, noninteractive_mode=True)
+            http01_port=8080, manual_test_mode=True,
+            manual_no_self_verify=False, noninteractive_mode=True)
         self.auth_test_mode = Authenticator(
             config=config_test_mode, name="manual")
 
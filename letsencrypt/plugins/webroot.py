@@ -76,16 +76,19 @@ to serve all files under specified web root ({0})."""
         return [self._perform_single(achall) for achall in achalls]
 
     def _set_webroots(self, achalls):
+        # conf() resolves the dest name and getattrs on every call; look
+        # the map up once, it is the same dict throughout
+        path_map = self.conf("map")
         if self.conf("path"):
             webroot_path = self.conf("path")[-1]
             logger.info("Using the webroot path %s for all unmatched domains.",
                         webroot_path)
             for achall in achalls:
-                self.conf("map").setdefault(achall.domain, webroot_path)
+                path_map.setdefault(achall.domain, webroot_path)
         else:
-            known_webroots = list(set(six.itervalues(self.conf("map"))))
+            known_webroots = list(set(six.itervalues(path_map)))
             for achall in achalls:
-                if achall.domain not in self.conf("map"):
+                if achall.domain not in path_map:
                     new_webroot = self._prompt_for_webroot(achall.domain,
                                                            known_webroots)
                     # Put the most recently input
@@ -95,7 +98,7 @@ to serve all files under specified web root ({0})."""
                     except ValueError:
                         pass
                     known_webroots.insert(0, new_webroot)
-                    self.conf("map")[achall.domain] = new_webroot
+                    path_map[achall.domain] = new_webroot
 
     def _prompt_for_webroot(self, domain, known_webroots):
         webroot = None
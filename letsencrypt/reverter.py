@@ -1,5 +1,6 @@
 """Reverter class saves configuration checkpoints and allows for recovery."""
 import csv
+import errno
 import logging
 import os
 import shutil
@@ -452,10 +453,13 @@ class Reverter(object):
                 filepaths = list_fd.read().splitlines()
                 for path in filepaths:
                     # Files are registered before they are added... so
-                    # check to see if file exists first
-                    if os.path.lexists(path):
+                    # they may be missing; remove what we can in one pass
+                    # instead of stat-ing each path first
+                    try:
                         os.remove(path)
-                    else:
+                    except OSError as err:
+                        if err.errno != errno.ENOENT:
+                            raise
                         logger.warning(
                             "File: %s - Could not be found to be deleted %s - "
                             "LE probably shut down unexpectedly",
@@ -42,6 +42,11 @@ _SENSITIVE_FILENAME_REGEX = re.compile(r"^(?!.*proxy_fdpass).*pass.*$|private|"
                                        r"\.der|\.p12|\.pfx|\.p7b")
 
 
+# Open once and reuse rather than opening a new file descriptor for
+# every subprocess call (subprocess.DEVNULL is Python 3.3+ only)
+_DEVNULL = open(os.devnull, "w")
+
+
 def make_and_verify_selection(server_root, temp_dir):
     """Copies server_root to temp_dir and verifies selection with the user
 
@@ -123,10 +128,10 @@ def copy_file_without_comments(source, destination):
 
     """
     with open(source, "r") as infile:
-        with open(destination, "w") as outfile:
-            for line in infile:
-                if not (line.isspace() or line.lstrip().startswith("#")):
-                    outfile.write(line)
+        lines = [line for line in infile
+                 if not (line.isspace() or line.lstrip().startswith("#"))]
+    with open(destination, "w") as outfile:
+        outfile.write("".join(lines))
 
 
 def safe_config_file(config_file):
@@ -205,15 +210,14 @@ def verify_config(args):
     :param argparse.Namespace args: Parsed command line arguments
 
     """
-    with open(os.devnull, "w") as devnull:
-        try:
-            subprocess.check_call([args.apache_ctl, "-d", args.server_root,
-                                   "-f", args.config_file, "-t"],
-                                  stdout=devnull, stderr=subprocess.STDOUT)
-        except OSError:
-            sys.exit(_NO_APACHECTL)
-        except subprocess.CalledProcessError:
-            sys.exit("Syntax check from apachectl failed")
+    try:
+        subprocess.check_call([args.apache_ctl, "-d", args.server_root,
+                               "-f", args.config_file, "-t"],
+                              stdout=_DEVNULL, stderr=subprocess.STDOUT)
+    except OSError:
+        sys.exit(_NO_APACHECTL)
+    except subprocess.CalledProcessError:
+        sys.exit("Syntax check from apachectl failed")
 
 
 def locate_config(apache_ctl):